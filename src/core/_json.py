@@ -0,0 +1,40 @@
+"""
+JSON backend selection: orjson if installed, else ujson, else the stdlib json.
+All backends expose the same str-returning dumps() and a loads() accepting str or bytes.
+
+Only the NLU module relies on this fallback to run without compiled wheels; the n8n
+client also needs msgspec for its typed incident payloads.
+"""
+
+try:
+    import orjson as _orjson
+
+    JSONDecodeError = _orjson.JSONDecodeError
+    loads = _orjson.loads
+
+    def dumps(obj, indent: bool = False) -> str:
+        """Serialize obj to a JSON string, optionally indented by 2 spaces."""
+        if indent:
+            return _orjson.dumps(obj, option=_orjson.OPT_INDENT_2).decode()
+        return _orjson.dumps(obj).decode()
+
+except ImportError:
+    try:
+        import ujson as _ujson
+
+        JSONDecodeError = getattr(_ujson, "JSONDecodeError", ValueError)
+        loads = _ujson.loads
+
+        def dumps(obj, indent: bool = False) -> str:
+            """Serialize obj to a JSON string, optionally indented by 2 spaces."""
+            return _ujson.dumps(obj, indent=2 if indent else 0)
+
+    except ImportError:
+        import json as _json
+
+        JSONDecodeError = _json.JSONDecodeError
+        loads = _json.loads
+
+        def dumps(obj, indent: bool = False) -> str:
+            """Serialize obj to a JSON string, optionally indented by 2 spaces."""
+            return _json.dumps(obj, indent=2 if indent else None)
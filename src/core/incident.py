@@ -0,0 +1,144 @@
+"""
+Incident payload definition shared across modules.
+Defines the n8n wire format and the helpers that build it.
+"""
+
+import msgspec
+from typing import Annotated, Optional, Dict, Any
+from datetime import date
+
+
+class Incident(msgspec.Struct):
+    """
+    Incident payload in the format expected by the n8n workflow.
+    Field order is the wire order.
+    """
+    policyId: str
+    customerName: str
+    incidentDate: Annotated[str, msgspec.Meta(pattern=r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$")]
+    incidentType: str
+    description: str
+    location: str
+    estimatedDamage: float
+
+
+# Per-type decoder compiled once; validates fields, types and date shape while parsing
+_DECODER = msgspec.json.Decoder(Incident)
+
+
+def _date_error(incident: Incident) -> Optional[str]:
+    """
+    The Incident pattern only checks the date shape; reject impossible dates like 2024-02-30.
+    """
+    try:
+        date.fromisoformat(incident.incidentDate)
+    except ValueError:
+        return "incidentDate must be in YYYY-MM-DD format"
+    return None
+
+
+def validate_incident(incident_data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+    """
+    Validate an incident dictionary against the Incident schema.
+    
+    Args:
+        incident_data: Dictionary containing incident fields to validate
+        
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    try:
+        incident = msgspec.convert(incident_data, Incident, strict=True)
+    except msgspec.ValidationError as e:
+        return False, str(e)
+    error = _date_error(incident)
+    return error is None, error
+
+
+def validate_incident_bytes(raw: bytes) -> tuple[bool, Optional[str]]:
+    """
+    Validate a raw JSON incident without building an intermediate dict.
+    
+    Args:
+        raw: JSON-encoded incident
+        
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    try:
+        incident = _DECODER.decode(raw)
+    except msgspec.DecodeError as e:
+        return False, str(e)
+    error = _date_error(incident)
+    return error is None, error
+
+
+# [date string, timestamp it was computed at], refreshed at most once a minute
+def payload_from_dict(incident_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the wire payload from a possibly partial dictionary (e.g. NLU claim data).
+    Fields are emitted in wire order; missing or null fields are sent as null so the
+    n8n workflow applies its own fallbacks, and unknown keys are dropped.
+    
+    Args:
+        incident_data: Dictionary of incident fields
+        
+    Returns:
+        Dictionary ready to be posted
+    """
+    payload = {field: incident_data.get(field) for field in Incident.__struct_fields__}
+    
+    # Normalize numeric strings like "5000"; anything else (e.g. "5000 USD") is sent as-is
+    damage = payload["estimatedDamage"]
+    if isinstance(damage, str):
+        try:
+            payload["estimatedDamage"] = float(damage)
+        except ValueError:
+            pass
+    return payload
+
+
+def create_incident_payload(
+    policy_id: str,
+    customer_name: str,
+    incident_type: str,
+    description: str,
+    location: str,
+    estimated_damage: float,
+    incident_date: Optional[str] = None
+) -> Incident:
+    """
+    Helper function to create a properly formatted incident payload.
+    
+    Args:
+        policy_id: Policy identifier
+        customer_name: Customer's full name
+        incident_type: Type of incident
+        description: Detailed description
+        location: Location of incident
+        estimated_damage: Estimated damage amount
+        incident_date: Date of incident (defaults to today if not provided)
+        
+    Returns:
+        Incident with properly formatted incident data
+        
+    Raises:
+        msgspec.ValidationError: If a field does not match the Incident types
+    """
+    if incident_date is None:
+        incident_date = date.today().isoformat()
+    
+    # convert() type-checks every field; calling Incident(...) directly would not
+    incident = msgspec.convert({
+        "policyId": policy_id,
+        "customerName": customer_name,
+        "incidentDate": incident_date,
+        "incidentType": incident_type,
+        "description": description,
+        "location": location,
+        "estimatedDamage": estimated_damage
+    }, Incident)
+    error = _date_error(incident)
+    if error is not None:
+        raise msgspec.ValidationError(error)
+    return incident
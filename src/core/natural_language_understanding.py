@@ -8,17 +8,43 @@ This module processes speech transcriptions in real-time, performing:
 4. All in a single OpenAI API call for efficiency
 """
 
-import json
-from openai import OpenAI
-from dotenv import load_dotenv
 import os
-from typing import Dict, Any, List
+import tempfile
+import time
+from functools import cache, lru_cache
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 from enum import Enum
-import requests
-from requests.exceptions import RequestException
 import re
 
-load_dotenv()
+from ._json import dumps, loads, JSONDecodeError
+
+MODEL = "gpt-4o-mini"
+PROMPT_VERSION = "v2"  # Bump when the system prompt changes to invalidate cached responses
+
+# Shared by all conversations so the in-process response cache works across calls;
+# created on first use so importing this module doesn't pay for the openai import
+_client = None
+
+
+@cache
+def _load_env():
+    """Load .env once, on first use rather than at import time."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def _get_client():
+    """
+    Return the shared OpenAI client, importing and creating it on first use.
+    """
+    global _client
+    if _client is None:
+        _load_env()
+        from openai import OpenAI
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
 
 
 class ConversationState(Enum):
@@ -33,6 +59,240 @@ class ConversationState(Enum):
     EMERGENCY_TRANSFER = "emergency_transfer"
 
 
+# Static instructions, sent once per request; dynamic context goes in the user turn
+SYSTEM_PROMPT = """You are an AI assistant for an insurance company call center. Process the conversation and return a JSON response.
+
+YOUR TASKS (in priority order):
+
+1. EMERGENCY DETECTION (highest priority):
+   - Detect ANY mention of: injuries, bleeding, pain, emergency, ambulance, hospital, hurt, unconscious
+   - Detect panic indicators: help, scared, dying, can't breathe
+   - If detected, set "emergency_detected": true and "emergency_reason": "<reason>"
+
+2. SENTIMENT ANALYSIS:
+   - Score frustration/anger from 0-10 based on:
+     * Tone indicators: angry, frustrated, upset, ridiculous, unacceptable
+     * Repeated questions or complaints
+     * Escalation language
+   - Return as "frustration_score": <float>
+
+3. CLAIM DATA EXTRACTION (follow this schema exactly):
+   {
+       "policyId": "string or null",
+       "customerName": "string or null",
+       "incidentType": "string or null",
+       "description": "string or null (detailed description of incident)",
+       "location": "string or null",
+       "estimatedDamage": "float or null (in USD)",
+       "incidentDate": "YYYY-MM-DD or null"
+   }
+   - Extract ANY new information from current input
+   - Keep existing data, only update with new information
+   - Return as "claim_data": {...}
+
+4. CONVERSATION STATE MANAGEMENT:
+   Progress through these states:
+   - GREETING → GATHERING_POLICY_INFO → GATHERING_INCIDENT_DETAILS → GATHERING_DAMAGE_INFO → CONFIRMING → COMPLETE
+   - Return as "conversation_state": "<STATE>"
+   
+5. RESPONSE GENERATION:
+   - Generate natural, empathetic response (under 30 words)
+   - Guide conversation based on current state and missing data
+   - If state is GATHERING_POLICY_INFO: ask for policy number and name
+   - If state is GATHERING_INCIDENT_DETAILS: ask about what happened, where, when
+   - If state is GATHERING_DAMAGE_INFO: ask about damage extent and costs
+   - If state is CONFIRMING: summarize and confirm details
+   - Keep tone professional but warm
+   - Return as "response": "<text>"
+
+REQUIRED JSON OUTPUT FORMAT:
+{
+    "emergency_detected": <boolean>,
+    "emergency_reason": "<string or empty>",
+    "frustration_score": <float 0-10>,
+    "claim_data": {
+        "policyId": <string or null>,
+        "customerName": <string or null>,
+        "incidentType": <string or null>,
+        "description": <string or null>,
+        "location": <string or null>,
+        "estimatedDamage": <float or null>,
+        "incidentDate": <string or null>
+    },
+    "conversation_state": "<STATE_NAME>",
+    "response": "<your natural language response>"
+}
+
+Remember: Return ONLY valid JSON. Be empathetic and guide the conversation naturally."""
+
+_SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+
+_USER_TMPL = """
+ CURRENT STATE: {state}
+ CURRENT CLAIM DATA: {claim_data}
+
+ CONVERSATION:
+{conversation}
+"""
+
+# Hash prefix shared by every cache key; only the dynamic context is hashed per call
+_CACHE_KEY_BASE = sha256(b"\x00".join((
+    MODEL.encode(), PROMPT_VERSION.encode(), SYSTEM_PROMPT.encode(), b""
+)))
+
+
+def _cache_dir() -> Optional[Path]:
+    """
+    Directory for the on-disk response cache, or None if caching is disabled.
+    Set EXTRACT_CACHE_DIR to enable it (useful for replaying recorded calls and testing).
+    """
+    _load_env()
+    cache_dir = os.getenv("EXTRACT_CACHE_DIR")
+    return Path(cache_dir) if cache_dir else None
+
+
+_NULLABLE_STRING = {"type": ["string", "null"]}
+
+# Structured Outputs schema, enforced server-side so the reply always parses
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "ConversationTurn",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "emergency_detected": {"type": "boolean"},
+                "emergency_reason": {"type": "string"},
+                "frustration_score": {"type": "number"},
+                "claim_data": {
+                    "type": "object",
+                    "properties": {
+                        "policyId": _NULLABLE_STRING,
+                        "customerName": _NULLABLE_STRING,
+                        "incidentType": _NULLABLE_STRING,
+                        "description": _NULLABLE_STRING,
+                        "location": _NULLABLE_STRING,
+                        "estimatedDamage": {"type": ["number", "null"]},
+                        "incidentDate": _NULLABLE_STRING
+                    },
+                    "required": [
+                        "policyId", "customerName", "incidentType", "description",
+                        "location", "estimatedDamage", "incidentDate"
+                    ],
+                    "additionalProperties": False
+                },
+                "conversation_state": {
+                    "type": "string",
+                    "enum": [state.name for state in ConversationState]
+                },
+                "response": {"type": "string"}
+            },
+            "required": [
+                "emergency_detected", "emergency_reason", "frustration_score",
+                "claim_data", "conversation_state", "response"
+            ],
+            "additionalProperties": False
+        }
+    }
+}
+
+MAX_RETRIES = 2  # Extra attempts when the model output fails validation
+
+
+def _validation_error(content: bytes) -> Optional[str]:
+    """
+    Check that a model response is JSON with the fields process_input relies on.
+    
+    Returns:
+        Description of the problem, or None if the response is valid
+    """
+    try:
+        result = loads(content)
+    except JSONDecodeError as e:
+        return f"invalid JSON ({e})"
+    if not isinstance(result, dict):
+        return "top-level value must be an object"
+    if not isinstance(result.get("response"), str):
+        return "'response' must be a string"
+    if not isinstance(result.get("claim_data"), dict):
+        return "'claim_data' must be an object"
+    if result.get("conversation_state") not in ConversationState.__members__:
+        return f"'conversation_state' must be one of {', '.join(ConversationState.__members__)}"
+    return None
+
+
+def _request_completion(dynamic_context: str) -> str:
+    """
+    Run the NLU completion, reusing a cached response for identical input.
+    
+    The cache is content-addressed on sha256(model, prompt version, system prompt, context),
+    so a hit costs one hash instead of a model call. Invalid entries are evicted on load.
+    If the model output fails validation, the error is fed back and the call retried.
+    
+    Args:
+        dynamic_context: Per-turn state, claim data and conversation window
+        
+    Returns:
+        Raw JSON string returned by the model
+        
+    Raises:
+        ValueError: If no valid response is produced after MAX_RETRIES retries
+    """
+    path = None
+    cache_dir = _cache_dir()
+    if cache_dir is not None:
+        key_hash = _CACHE_KEY_BASE.copy()
+        key_hash.update(dynamic_context.encode())
+        key = key_hash.hexdigest()
+        path = cache_dir / f"{key}.json"
+        if path.exists():
+            content = path.read_bytes()
+            if _validation_error(content) is None:
+                return content.decode()
+            path.unlink(missing_ok=True)
+    
+    messages = [_SYSTEM_MSG, {"role": "user", "content": dynamic_context}]
+    for attempt in range(MAX_RETRIES + 1):
+        response = _get_client().chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=0.7,
+            response_format=RESPONSE_FORMAT
+        )
+        # content is None when the model refuses
+        content = response.choices[0].message.content or ""
+        error = _validation_error(content.encode())
+        if error is None:
+            break
+        if attempt == MAX_RETRIES:
+            raise ValueError(f"Invalid NLU response: {error}")
+        messages = messages + [
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": f"Your output had error: {error}. Fix and retry."}
+        ]
+        time.sleep(1.0 * (attempt + 1))
+    
+    if path is not None:
+        # Write to a temp file first so readers never see a partial entry
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as tmp:
+            tmp.write(content.encode())
+        os.replace(tmp.name, path)
+    
+    return content
+
+
+@lru_cache(maxsize=512)
+def _cached_completion(dynamic_context: str) -> str:
+    """
+    In-process memoization of recent completions, checked before the disk cache.
+    Returns the raw JSON string so callers never share a mutable result dict.
+    Invalid responses raise in _request_completion and are therefore never memoized.
+    """
+    return _request_completion(dynamic_context)
+
+
 class ConversationalNLU:
     """
     Real-time NLU processing for insurance call handling.
@@ -40,22 +300,12 @@ class ConversationalNLU:
     extracts claim data, and generates appropriate responses.
     """
     
+    # Drop memoized completions (e.g. between tests)
+    cache_clear = staticmethod(_cached_completion.cache_clear)
+    
     def __init__(self):
-        """Initialize the NLU with OpenAI client and conversation state."""
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.conversation_history: List[str] = []  # Context window
-        self.state = ConversationState.GREETING
-        self.claim_data = {
-            "policyId": None,
-            "customerName": None,
-            "incidentType": None,
-            "description": None,
-            "location": None,
-            "estimatedDamage": None,
-            "incidentDate": None
-        }
-        self.frustration_score = 0.0
-        self.base_system_prompt = self._build_base_system_prompt()  # Build once at start
+        """Initialize the NLU conversation state."""
+        self.reset()
         
     def process_input(self, user_text: str) -> Dict[str, Any]:
         """
@@ -132,27 +382,16 @@ class ConversationalNLU:
         # end TO_REVIEW handling
          
         # Build dynamic context (only what changes)
-        dynamic_context = f"""
- CURRENT STATE: {self.state.value}
- CURRENT CLAIM DATA: {json.dumps(self.claim_data, indent=2)}
-
- CONVERSATION:
-{chr(10).join(self.conversation_history[-6:])}
-"""
+        dynamic_context = _USER_TMPL.format(
+            state=self.state.value,
+            claim_data=dumps(self.claim_data, indent=True),
+            conversation="\n".join(self.conversation_history[-6:])
+        )
         
         # Single API call with structured output request
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": self.base_system_prompt},
-                    {"role": "user", "content": dynamic_context}
-                ],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
-            
-            result = json.loads(response.choices[0].message.content)
+            content = _cached_completion(dynamic_context)
+            result = loads(content)
             
             # Extract all information from single response
             assistant_response = result.get("response", "I'm sorry, could you repeat that?")
@@ -260,79 +499,6 @@ class ConversationalNLU:
                 "is_complete": False
             }
     
-    def _build_base_system_prompt(self) -> str:
-        """
-        Build base system prompt once at initialization.
-        Dynamic context (state, claim data, conversation) is passed separately.
-        
-        Returns:
-            Base system prompt string with all instructions
-        """
-        return """You are an AI assistant for an insurance company call center. Process the conversation and return a JSON response.
-
-YOUR TASKS (in priority order):
-
-1. EMERGENCY DETECTION (highest priority):
-   - Detect ANY mention of: injuries, bleeding, pain, emergency, ambulance, hospital, hurt, unconscious
-   - Detect panic indicators: help, scared, dying, can't breathe
-   - If detected, set "emergency_detected": true and "emergency_reason": "<reason>"
-
-2. SENTIMENT ANALYSIS:
-   - Score frustration/anger from 0-10 based on:
-     * Tone indicators: angry, frustrated, upset, ridiculous, unacceptable
-     * Repeated questions or complaints
-     * Escalation language
-   - Return as "frustration_score": <float>
-
-3. CLAIM DATA EXTRACTION (follow this schema exactly):
-   {{
-       "policyId": "string or null",
-       "customerName": "string or null",
-       "incidentType": "string or null",
-       "description": "string or null (detailed description of incident)",
-       "location": "string or null",
-       "estimatedDamage": "float or null (in USD)",
-       "incidentDate": "YYYY-MM-DD or null"
-   }}
-   - Extract ANY new information from current input
-   - Keep existing data, only update with new information
-   - Return as "claim_data": {{...}}
-
-4. CONVERSATION STATE MANAGEMENT:
-   Progress through these states:
-   - GREETING → GATHERING_POLICY_INFO → GATHERING_INCIDENT_DETAILS → GATHERING_DAMAGE_INFO → CONFIRMING → COMPLETE
-   - Return as "conversation_state": "<STATE>"
-   
-5. RESPONSE GENERATION:
-   - Generate natural, empathetic response (under 30 words)
-   - Guide conversation based on current state and missing data
-   - If state is GATHERING_POLICY_INFO: ask for policy number and name
-   - If state is GATHERING_INCIDENT_DETAILS: ask about what happened, where, when
-   - If state is GATHERING_DAMAGE_INFO: ask about damage extent and costs
-   - If state is CONFIRMING: summarize and confirm details
-   - Keep tone professional but warm
-   - Return as "response": "<text>"
-
-REQUIRED JSON OUTPUT FORMAT:
-{{
-    "emergency_detected": <boolean>,
-    "emergency_reason": "<string or empty>",
-    "frustration_score": <float 0-10>,
-    "claim_data": {{
-        "policyId": <string or null>,
-        "customerName": <string or null>,
-        "incidentType": <string or null>,
-        "description": <string or null>,
-        "location": <string or null>,
-        "estimatedDamage": <float or null>,
-        "incidentDate": <string or null>
-    }},
-    "conversation_state": "<STATE_NAME>",
-    "response": "<your natural language response>"
-}}
-
-Remember: Return ONLY valid JSON. Be empathetic and guide the conversation naturally."""
-    
     def _check_claim_completion(self) -> bool:
         """
         Check if all required claim fields are collected.
@@ -359,7 +525,7 @@ Remember: Return ONLY valid JSON. Be empathetic and guide the conversation natur
     
     def reset(self):
         """Reset conversation for new call."""
-        self.conversation_history = []
+        self.conversation_history: List[str] = []  # Context window
         self.state = ConversationState.GREETING
         self.claim_data = {
             "policyId": None,
@@ -3,10 +3,33 @@ Module for posting incident data to n8n webhook.
 Handles communication with n8n automation workflows.
 """
 
+import asyncio
+import logging
+import queue
+import threading
+import time
 import requests
-import json
-from typing import Optional, Dict, Any
-from datetime import datetime
+import httpx
+import msgspec
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, Dict, Any, List, Union
+
+from ._json import loads, JSONDecodeError
+from .incident import (
+    Incident, create_incident_payload, payload_from_dict, validate_incident
+)
+
+logger = logging.getLogger("n8n.webhook")
+
+# Reused for every request body; serializes straight to UTF-8 bytes for data=/content=
+_ENCODER = msgspec.json.Encoder()
+
+# Responses meaning n8n never ran the workflow, so a POST is safe to repeat
+RETRY_STATUSES = (502, 503)
+
+# Sentinel telling the background worker to exit
+_STOP = object()
 
 
 class N8NWebhookClient:
@@ -15,16 +38,117 @@ class N8NWebhookClient:
     Manages the communication with n8n automation platform.
     """
     
-    def __init__(self, webhook_url: str, timeout: int = 30):
+    def __init__(
+        self,
+        webhook_url: str,
+        timeout: int = 30,
+        max_batch: int = 1,
+        max_wait: float = 0.1
+    ):
         """
         Initialize the n8n webhook client.
         
         Args:
             webhook_url: The n8n webhook URL (e.g., https://your-n8n.com/webhook/incident)
             timeout: Request timeout in seconds (default: 30)
+            max_batch: Maximum queued incidents the background worker coalesces into one
+                       array POST (default: 1, i.e. no batching; raise it only if the
+                       workflow accepts array bodies)
+            max_wait: Seconds the worker waits to fill a batch (default: 0.1)
         """
         self.webhook_url = webhook_url
         self.timeout = timeout
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        
+        # Reuse one session so repeated posts keep the TCP/TLS connection alive
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            # Only connect errors and 502/503 (n8n unreachable or not ready) are retried.
+            # Read timeouts and 504s are not: the claim may already have been created.
+            # read=False re-raises read timeouts untouched, so requests raises Timeout
+            # instead of "Max retries exceeded"
+            max_retries=Retry(
+                total=2,
+                read=False,
+                backoff_factor=0.2,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({"POST"}),
+                raise_on_status=False
+            )
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        
+        # Async client for posting several incidents concurrently, created on first use
+        self.aclient = None
+        
+        # Background dispatcher for fire-and-forget posts, started on first use
+        self._q = queue.Queue(maxsize=1024)
+        self._worker_thread = None
+        self._worker_session = None
+        self._worker_lock = threading.Lock()
+    
+    def close(self):
+        """
+        Flush queued background posts, then close the underlying HTTP session
+        and release pooled connections. If post_incident_async() was used, call
+        aclose() instead so the async client is closed as well.
+        """
+        self._stop_worker()
+        self.session.close()
+    
+    def _stop_worker(self):
+        """
+        Flush the queue and stop the background worker if it is running.
+        The worker state is reset so a later post_incident_nowait() starts a new one.
+        """
+        with self._worker_lock:
+            if self._worker_thread is None:
+                return
+            self._q.put(_STOP)
+            self._worker_thread.join()
+            self._worker_session.close()
+            self._worker_thread = None
+            self._worker_session = None
+    
+    async def aclose(self):
+        """
+        Close the async HTTP client, then the sync session and background worker.
+        
+        The worker join runs in a thread so draining the queue never blocks the event loop.
+        """
+        if self.aclient is not None:
+            await self.aclient.aclose()
+            self.aclient = None
+        await asyncio.to_thread(self.close)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+    
+    def _get_aclient(self) -> httpx.AsyncClient:
+        """
+        Return the async HTTP client, creating it on first use.
+        """
+        if self.aclient is None:
+            self.aclient = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+                headers={"Content-Type": "application/json"}
+            )
+        return self.aclient
     
     def post_incident(
         self,
@@ -52,86 +176,291 @@ class N8NWebhookClient:
             Dictionary containing the response from n8n webhook
             
         Raises:
-            requests.exceptions.RequestException: If the request fails
-        """
-        # Construct the payload matching the n8n expected format
-        payload = {
-            "policyId": policy_id,
-            "customerName": customer_name,
-            "incidentDate": incident_date,
-            "incidentType": incident_type,
-            "description": description,
-            "location": location,
-            "estimatedDamage": estimated_damage
-        }
-        
-        print(f"[N8NWebhookClient] Posting incident to n8n webhook...")
-        print(f"[N8NWebhookClient] Policy: {policy_id}, Customer: {customer_name}")
+            msgspec.ValidationError: If a field does not match the Incident types
+        """
+        payload = create_incident_payload(
+            policy_id, customer_name, incident_type, description,
+            location, estimated_damage, incident_date
+        )
+        logger.info("Posting incident policy=%s customer=%s", policy_id, customer_name)
+        return self._post(payload)
+    
+    def _post(
+        self,
+        payload: Union[Incident, Dict[str, Any], List[Any]]
+    ) -> Dict[str, Any]:
+        """
+        Post an encodable body to the n8n webhook.
         
+        Args:
+            payload: Incident, wire-format dictionary, or list of either for a batch
+            
+        Returns:
+            Dictionary containing the response from n8n webhook
+        """
         try:
             # Make POST request to n8n webhook
-            response = requests.post(
+            response = self.session.post(
                 self.webhook_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
+                data=_ENCODER.encode(payload),
                 timeout=self.timeout
             )
             
             # Raise exception for bad status codes
             response.raise_for_status()
             
-            print(f"[N8NWebhookClient] ✅ Successfully posted to n8n (Status: {response.status_code})")
+            logger.info("Successfully posted to n8n (status=%s)", response.status_code)
             
-            # Try to parse JSON response, fallback to text if not JSON
-            try:
-                return {
-                    "success": True,
-                    "status_code": response.status_code,
-                    "response": response.json()
-                }
-            except json.JSONDecodeError:
-                return {
-                    "success": True,
-                    "status_code": response.status_code,
-                    "response": response.text
-                }
+            return self._build_result(response.status_code, response.content, response.text)
                 
         except requests.exceptions.Timeout:
-            error_msg = f"Request timed out after {self.timeout} seconds"
-            print(f"[N8NWebhookClient] ❌ Error: {error_msg}")
-            return {
-                "success": False,
-                "error": error_msg
-            }
+            return self._timeout_result()
             
         except requests.exceptions.RequestException as e:
-            error_msg = f"Request failed: {str(e)}"
-            print(f"[N8NWebhookClient] ❌ Error: {error_msg}")
+            return self._failure_result(e)
+    
+    async def post_incident_async(
+        self,
+        policy_id: str,
+        customer_name: str,
+        incident_date: str,
+        incident_type: str,
+        description: str,
+        location: str,
+        estimated_damage: float
+    ) -> Dict[str, Any]:
+        """
+        Post an incident report to the n8n webhook without blocking the event loop.
+        Several posts can be fanned out with asyncio.gather(); use the client as
+        an async context manager (or await aclose()) to release its connections.
+        
+        Args:
+            Same as post_incident()
+            
+        Returns:
+            Dictionary containing the response from n8n webhook
+            
+        Raises:
+            msgspec.ValidationError: If a field does not match the Incident types
+        """
+        payload = create_incident_payload(
+            policy_id, customer_name, incident_type, description,
+            location, estimated_damage, incident_date
+        )
+        
+        logger.info("Posting incident (async) policy=%s customer=%s", policy_id, customer_name)
+        
+        try:
+            response = await self._get_aclient().post(self.webhook_url, content=_ENCODER.encode(payload))
+            response.raise_for_status()
+            
+            logger.info("Successfully posted to n8n (status=%s)", response.status_code)
+            
+            return self._build_result(response.status_code, response.content, response.text)
+            
+        except httpx.TimeoutException:
+            return self._timeout_result()
+            
+        except httpx.HTTPError as e:
+            return self._failure_result(e)
+    
+    def post_incident_nowait(
+        self,
+        policy_id: str,
+        customer_name: str,
+        incident_date: str,
+        incident_type: str,
+        description: str,
+        location: str,
+        estimated_damage: float
+    ) -> None:
+        """
+        Queue an incident report for posting in the background and return immediately.
+        Use post_incident() instead when the n8n response is needed.
+        
+        Args:
+            Same as post_incident()
+            
+        Raises:
+            msgspec.ValidationError: If a field does not match the Incident types
+            queue.Full: If the background queue is full
+        """
+        payload = create_incident_payload(
+            policy_id, customer_name, incident_type, description,
+            location, estimated_damage, incident_date
+        )
+        self._start_worker()
+        self._q.put_nowait(payload)
+    
+    def _start_worker(self):
+        """
+        Start the background worker and its session if not already running.
+        The worker retries on its own, so its session has no adapter retries;
+        one retry layer keeps a queued incident from being posted repeatedly.
+        """
+        with self._worker_lock:
+            if self._worker_thread is not None:
+                return
+            self._worker_session = requests.Session()
+            self._worker_session.headers.update({"Content-Type": "application/json"})
+            self._worker_thread = threading.Thread(target=self._worker, daemon=True)
+            self._worker_thread.start()
+    
+    def post_incidents_batch(self, incidents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Post several incidents as a single JSON array in one request.
+        The n8n workflow must accept an array body.
+        
+        Args:
+            incidents: List of incident dictionaries
+            
+        Returns:
+            Dictionary containing the response from n8n webhook
+        """
+        for index, incident in enumerate(incidents):
+            is_valid, error = self.validate_incident_data(incident)
+            if not is_valid:
+                return {
+                    "success": False,
+                    "error": f"Incident {index}: {error}"
+                }
+        
+        logger.info("Posting batch of %d incidents", len(incidents))
+        return self._post(incidents)
+    
+    def _worker(self):
+        """
+        Background loop posting queued payloads until the stop sentinel is received.
+        Drains up to max_batch payloads, waiting at most max_wait for more to arrive,
+        and posts them in one request.
+        """
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch and batch[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            stop = batch[-1] is _STOP
+            payloads = batch[:-1] if stop else batch
+            try:
+                if len(payloads) == 1:
+                    self._send_with_retry(payloads[0])
+                elif payloads:
+                    self._send_with_retry(payloads)
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+            if stop:
+                return
+    
+    def _send_with_retry(
+        self,
+        payload: Union[Incident, List[Incident]],
+        max_attempts: int = 3
+    ) -> bool:
+        """
+        Post a payload, retrying with exponential backoff on failure.
+        Only connection errors and 502/503 responses are retried. Timeouts, 500s and
+        504s are dropped because n8n may already have the claim (partial workflow run
+        or gateway timeout); 4xx responses will never be accepted.
+        
+        Args:
+            payload: Incident payload, or list of payloads for a batch
+            max_attempts: Maximum number of attempts (default: 3)
+            
+        Returns:
+            Boolean indicating if the payload was delivered
+        """
+        for attempt in range(max_attempts):
+            try:
+                response = self._worker_session.post(
+                    self.webhook_url,
+                    data=_ENCODER.encode(payload),
+                    timeout=self.timeout
+                )
+            except requests.exceptions.ConnectionError as e:
+                error = e
+            except requests.exceptions.RequestException as e:
+                logger.error("Background post failed, not retrying: %s", e)
+                return False
+            else:
+                if response.ok:
+                    logger.info("Background post delivered (status=%s)", response.status_code)
+                    return True
+                if response.status_code not in RETRY_STATUSES:
+                    logger.error("Background post failed, not retrying (status=%s)", response.status_code)
+                    return False
+                error = f"HTTP {response.status_code}"
+            
+            logger.error("Background post failed (attempt %d/%d): %s", attempt + 1, max_attempts, error)
+            if attempt < max_attempts - 1:
+                time.sleep(0.5 * 2 ** attempt)
+        return False
+    
+    def _timeout_result(self) -> Dict[str, Any]:
+        """
+        Log and build the failure result for a request that timed out.
+        """
+        logger.error("Request timed out after %s seconds", self.timeout)
+        return {
+            "success": False,
+            "error": f"Request timed out after {self.timeout} seconds"
+        }
+    
+    @staticmethod
+    def _failure_result(error: Exception) -> Dict[str, Any]:
+        """
+        Log and build the failure result for a request that failed.
+        """
+        logger.error("Request failed: %s", error)
+        return {
+            "success": False,
+            "error": f"Request failed: {str(error)}"
+        }
+    
+    @staticmethod
+    def _build_result(status_code: int, content: bytes, text: str) -> Dict[str, Any]:
+        """
+        Build the success result, parsing the body as JSON and falling back to text.
+        """
+        try:
+            return {
+                "success": True,
+                "status_code": status_code,
+                "response": loads(content)
+            }
+        except JSONDecodeError:
             return {
-                "success": False,
-                "error": error_msg
+                "success": True,
+                "status_code": status_code,
+                "response": text
             }
     
     def post_incident_from_dict(self, incident_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Post an incident using a dictionary of data.
-        Convenience method for when you already have the data structured.
+        Convenience method for when you already have the data structured,
+        e.g. the claim data collected by the NLU.
         
         Args:
-            incident_data: Dictionary containing all incident fields
+            incident_data: Dictionary of incident fields; missing or null fields
+                           are sent as null
             
         Returns:
             Dictionary containing the response from n8n webhook
         """
-        return self.post_incident(
-            policy_id=incident_data["policyId"],
-            customer_name=incident_data["customerName"],
-            incident_date=incident_data["incidentDate"],
-            incident_type=incident_data["incidentType"],
-            description=incident_data["description"],
-            location=incident_data["location"],
-            estimated_damage=incident_data["estimatedDamage"]
+        payload = payload_from_dict(incident_data)
+        logger.info(
+            "Posting incident policy=%s customer=%s",
+            payload["policyId"], payload["customerName"]
         )
+        return self._post(payload)
     
     def validate_incident_data(self, incident_data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
         """
@@ -144,62 +473,4 @@ class N8NWebhookClient:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        required_fields = [
-            "policyId", "customerName", "incidentDate", 
-            "incidentType", "description", "location", "estimatedDamage"
-        ]
-        
-        # Check for missing fields
-        for field in required_fields:
-            if field not in incident_data:
-                return False, f"Missing required field: {field}"
-        
-        # Validate date format (basic check)
-        try:
-            datetime.strptime(incident_data["incidentDate"], "%Y-%m-%d")
-        except ValueError:
-            return False, "incidentDate must be in YYYY-MM-DD format"
-        
-        # Validate estimated damage is numeric
-        if not isinstance(incident_data["estimatedDamage"], (int, float)):
-            return False, "estimatedDamage must be a number"
-        
-        return True, None
-
-
-def create_incident_payload(
-    policy_id: str,
-    customer_name: str,
-    incident_type: str,
-    description: str,
-    location: str,
-    estimated_damage: float,
-    incident_date: Optional[str] = None
-) -> Dict[str, Any]:
-    """
-    Helper function to create a properly formatted incident payload.
-    
-    Args:
-        policy_id: Policy identifier
-        customer_name: Customer's full name
-        incident_type: Type of incident
-        description: Detailed description
-        location: Location of incident
-        estimated_damage: Estimated damage amount
-        incident_date: Date of incident (defaults to today if not provided)
-        
-    Returns:
-        Dictionary with properly formatted incident data
-    """
-    if incident_date is None:
-        incident_date = datetime.now().strftime("%Y-%m-%d")
-    
-    return {
-        "policyId": policy_id,
-        "customerName": customer_name,
-        "incidentDate": incident_date,
-        "incidentType": incident_type,
-        "description": description,
-        "location": location,
-        "estimatedDamage": estimated_damage
-    }
+        return validate_incident(incident_data)
@@ -2,8 +2,8 @@ from elevenlabs import ElevenLabs
 from pydub import AudioSegment
 import sounddevice as sd
 import numpy as np
-import io
 import os
+import tempfile
 import threading
 from dotenv import load_dotenv
 
@@ -32,22 +32,26 @@ def text_to_speech(text_input: str):
         output_format="mp3_22050_32"  # Lower quality for faster streaming
     )
 
-    # Combine all chunks from generator
-    audio_bytes = b"".join(audio_stream)
+    # Spool chunks as they arrive instead of joining them into one bytes object
+    # (stays in memory up to 4 MB, then rolls over to disk)
+    with tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024) as buf:
+        for chunk in audio_stream:
+            buf.write(chunk)
+        buf.seek(0)
 
-    # Decode MP3 to AudioSegment
-    audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
+        # Decode MP3 to AudioSegment
+        audio = AudioSegment.from_file(buf, format="mp3")
 
-    # Convert to numpy array for sounddevice
-    samples = np.array(audio.get_array_of_samples())
+    # sounddevice plays int16 directly, so view the decoded PCM without copying
+    # or converting it to float32
+    if audio.sample_width != 2:
+        audio = audio.set_sample_width(2)
+    samples = np.frombuffer(audio.raw_data, dtype=np.int16)
     
     # If stereo, reshape
     if audio.channels == 2:
         samples = samples.reshape((-1, 2))
     
-    # Normalize to float32
-    samples = samples.astype(np.float32) / (2**15)
-    
     def play_audio():
         """Play audio in a separate thread"""
         global _audio_playing
@@ -0,0 +1,70 @@
+"""
+Tests for incident payload validation and construction.
+"""
+
+import sys
+import os
+
+import msgspec
+import pytest
+
+# Add src to path to import the module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from core.incident import (
+    create_incident_payload, payload_from_dict,
+    validate_incident, validate_incident_bytes
+)
+
+
+VALID_INCIDENT = {
+    "policyId": "POL-001",
+    "customerName": "Jane Doe",
+    "incidentDate": "2024-03-15",
+    "incidentType": "Auto Accident",
+    "description": "Rear-ended at a red light",
+    "location": "Main St",
+    "estimatedDamage": 2500
+}
+
+
+def test_valid_incident():
+    assert validate_incident(VALID_INCIDENT) == (True, None)
+
+
+def test_missing_field_rejected():
+    incident = {k: v for k, v in VALID_INCIDENT.items() if k != "location"}
+    is_valid, error = validate_incident(incident)
+    assert not is_valid
+    assert "location" in error
+
+
+def test_impossible_date_rejected():
+    is_valid, error = validate_incident({**VALID_INCIDENT, "incidentDate": "2024-02-30"})
+    assert not is_valid
+    assert "incidentDate" in error
+
+
+def test_bool_damage_rejected():
+    is_valid, error = validate_incident({**VALID_INCIDENT, "estimatedDamage": True})
+    assert not is_valid
+    assert "estimatedDamage" in error
+
+
+def test_validate_bytes():
+    assert validate_incident_bytes(msgspec.json.encode(VALID_INCIDENT)) == (True, None)
+    assert not validate_incident_bytes(b'{"policyId": "POL-001"}')[0]
+    assert not validate_incident_bytes(b"{not json")[0]
+
+
+def test_create_payload_rejects_wrong_types():
+    with pytest.raises(msgspec.ValidationError):
+        create_incident_payload("POL-001", "Jane Doe", "Auto Accident", "", "Main St", {1.0})
+
+
+def test_payload_from_dict_passes_nulls_through():
+    payload = payload_from_dict({"policyId": "POL-001", "customerName": None, "estimatedDamage": "5000"})
+    assert payload["customerName"] is None
+    assert payload["incidentDate"] is None
+    assert payload["estimatedDamage"] == 5000.0
+    assert payload_from_dict({"estimatedDamage": "5000 USD"})["estimatedDamage"] == "5000 USD"
@@ -0,0 +1,162 @@
+"""
+Tests for the NLU completion cache and response validation.
+Uses a stub OpenAI client, so no API key or network access is needed.
+"""
+
+import sys
+import os
+import json
+from types import SimpleNamespace
+
+import pytest
+
+# Add src to path to import the module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+import core.natural_language_understanding as nlu
+
+
+VALID_REPLY = json.dumps({
+    "emergency_detected": False,
+    "emergency_reason": "",
+    "frustration_score": 1.0,
+    "claim_data": {
+        "policyId": "POL-001",
+        "customerName": None,
+        "incidentType": None,
+        "description": None,
+        "location": None,
+        "estimatedDamage": None,
+        "incidentDate": None
+    },
+    "conversation_state": "GATHERING_POLICY_INFO",
+    "response": "Could you tell me your name?"
+})
+
+
+class StubClient:
+    """
+    Minimal stand-in for the OpenAI client returning queued replies.
+    """
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        content = self.replies.pop(0)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def stub_client(monkeypatch):
+    """
+    Install a stub client and isolate the module from .env and the in-process cache.
+    """
+    def install(replies):
+        client = StubClient(replies)
+        monkeypatch.setattr(nlu, "_client", client)
+        return client
+
+    monkeypatch.setattr(nlu, "_load_env", lambda: None)
+    monkeypatch.delenv("EXTRACT_CACHE_DIR", raising=False)
+    nlu.ConversationalNLU.cache_clear()
+    yield install
+    nlu.ConversationalNLU.cache_clear()
+
+
+def test_cache_miss_then_hit(stub_client, monkeypatch, tmp_path):
+    """
+    The first call reaches the model and stores the reply; the second is served from disk.
+    """
+    monkeypatch.setenv("EXTRACT_CACHE_DIR", str(tmp_path))
+    client = stub_client([VALID_REPLY])
+
+    assert nlu._request_completion("CONTEXT") == VALID_REPLY
+    assert len(client.calls) == 1
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    assert nlu._request_completion("CONTEXT") == VALID_REPLY
+    assert len(client.calls) == 1
+
+
+def test_cache_disabled_without_env(stub_client, tmp_path):
+    """
+    Without EXTRACT_CACHE_DIR every call reaches the model.
+    """
+    client = stub_client([VALID_REPLY, VALID_REPLY])
+
+    nlu._request_completion("CONTEXT")
+    nlu._request_completion("CONTEXT")
+    assert len(client.calls) == 2
+
+
+def test_corrupt_cache_entry_is_evicted(stub_client, monkeypatch, tmp_path):
+    """
+    An invalid cached entry is discarded and replaced by a fresh model reply.
+    """
+    monkeypatch.setenv("EXTRACT_CACHE_DIR", str(tmp_path))
+    client = stub_client([VALID_REPLY, VALID_REPLY])
+
+    nlu._request_completion("CONTEXT")
+    (entry,) = tmp_path.glob("*.json")
+    entry.write_bytes(b"{not json")
+
+    assert nlu._request_completion("CONTEXT") == VALID_REPLY
+    assert len(client.calls) == 2
+    assert entry.read_bytes().decode() == VALID_REPLY
+
+
+def test_invalid_reply_is_retried_with_feedback(stub_client, monkeypatch):
+    """
+    An invalid reply is fed back to the model as an error and the call retried.
+    """
+    monkeypatch.setattr(nlu.time, "sleep", lambda seconds: None)
+    client = stub_client(["not json", VALID_REPLY])
+
+    assert nlu._request_completion("CONTEXT") == VALID_REPLY
+    assert len(client.calls) == 2
+    retry_messages = client.calls[1]["messages"]
+    assert retry_messages[-2] == {"role": "assistant", "content": "not json"}
+    assert retry_messages[-1]["content"].startswith("Your output had error: invalid JSON")
+
+
+def test_retries_exhausted_raises(stub_client, monkeypatch):
+    """
+    After MAX_RETRIES invalid replies the call fails instead of returning bad data.
+    """
+    monkeypatch.setattr(nlu.time, "sleep", lambda seconds: None)
+    bad_state = json.loads(VALID_REPLY)
+    bad_state["conversation_state"] = "UNKNOWN"
+    client = stub_client([json.dumps(bad_state)] * (nlu.MAX_RETRIES + 1))
+
+    with pytest.raises(ValueError, match="conversation_state"):
+        nlu._request_completion("CONTEXT")
+    assert len(client.calls) == nlu.MAX_RETRIES + 1
+
+
+def test_cached_completion_memoizes_in_process(stub_client):
+    """
+    Repeated contexts are answered from the in-process cache without a second model call.
+    """
+    client = stub_client([VALID_REPLY])
+
+    assert nlu._cached_completion("CONTEXT") == VALID_REPLY
+    assert nlu._cached_completion("CONTEXT") == VALID_REPLY
+    assert len(client.calls) == 1
+
+
+def test_cached_completion_does_not_memoize_failures(stub_client, monkeypatch):
+    """
+    A failed completion is not cached, so the next call for the same context retries.
+    """
+    monkeypatch.setattr(nlu.time, "sleep", lambda seconds: None)
+    client = stub_client(["not json"] * (nlu.MAX_RETRIES + 1) + [VALID_REPLY])
+
+    with pytest.raises(ValueError):
+        nlu._cached_completion("CONTEXT")
+    assert nlu._cached_completion("CONTEXT") == VALID_REPLY
+    assert len(client.calls) == nlu.MAX_RETRIES + 2
@@ -0,0 +1,184 @@
+"""
+Tests for the n8n webhook client against a local HTTP server.
+No n8n instance or network access is needed.
+"""
+
+import sys
+import os
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add src to path to import the module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+import core.post_to_n8n as n8n
+from core.post_to_n8n import N8NWebhookClient
+
+
+INCIDENT_ARGS = ("POL-001", "Jane Doe", "2024-03-15", "Auto Accident", "Rear-ended", "Main St", 2500.0)
+
+VALID_INCIDENT = {
+    "policyId": "POL-001",
+    "customerName": "Jane Doe",
+    "incidentDate": "2024-03-15",
+    "incidentType": "Auto Accident",
+    "description": "Rear-ended at a red light",
+    "location": "Main St",
+    "estimatedDamage": 2500
+}
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """
+    Records each POST body; /busy answers 503 and /slow stalls before answering.
+    """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append((self.path, json.loads(body)))
+        if self.path == "/slow":
+            threading.Event().wait(1.0)
+        self.send_response(503 if self.path == "/busy" else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def webhook():
+    """
+    Run a local webhook server; yields its base URL and the list of received bodies.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), WebhookHandler)
+    server.received = []
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", server.received
+    server.shutdown()
+    server.server_close()
+
+
+def test_post_incident_success(webhook):
+    base_url, received = webhook
+    with N8NWebhookClient(f"{base_url}/ok") as client:
+        result = client.post_incident(*INCIDENT_ARGS)
+
+    assert result == {"success": True, "status_code": 200, "response": {}}
+    assert len(received) == 1
+    assert received[0][1]["policyId"] == "POL-001"
+
+
+def test_unavailable_is_retried(webhook):
+    """
+    503 is retried by the session adapter: one attempt plus two retries.
+    """
+    base_url, received = webhook
+    with N8NWebhookClient(f"{base_url}/busy") as client:
+        result = client.post_incident(*INCIDENT_ARGS)
+
+    assert not result["success"]
+    assert len(received) == 3
+
+
+def test_read_timeout_is_not_retried(webhook):
+    """
+    The server may already have created the claim, so a read timeout is never re-sent.
+    """
+    base_url, received = webhook
+    with N8NWebhookClient(f"{base_url}/slow", timeout=0.2) as client:
+        result = client.post_incident(*INCIDENT_ARGS)
+
+    assert result["error"] == "Request timed out after 0.2 seconds"
+    assert len(received) == 1
+
+
+def test_batch_is_validated_before_posting(webhook):
+    base_url, received = webhook
+    invalid = {**VALID_INCIDENT, "incidentDate": "2024-02-30"}
+    with N8NWebhookClient(f"{base_url}/ok") as client:
+        result = client.post_incidents_batch([VALID_INCIDENT, invalid])
+        assert result["error"].startswith("Incident 1:")
+        assert not received
+
+        assert client.post_incidents_batch([VALID_INCIDENT, VALID_INCIDENT])["success"]
+
+    assert received == [("/ok", [VALID_INCIDENT, VALID_INCIDENT])]
+
+
+def test_close_flushes_queue(webhook):
+    base_url, received = webhook
+    client = N8NWebhookClient(f"{base_url}/ok")
+    for _ in range(3):
+        client.post_incident_nowait(*INCIDENT_ARGS)
+    client.close()
+
+    assert len(received) == 3
+    assert all(isinstance(body, dict) for _, body in received)
+
+
+def test_worker_coalesces_queued_posts(webhook):
+    """
+    With max_batch > 1 the worker sends queued incidents as one array POST.
+    """
+    base_url, received = webhook
+    client = N8NWebhookClient(f"{base_url}/ok", max_batch=5, max_wait=0.5)
+    for _ in range(3):
+        client.post_incident_nowait(*INCIDENT_ARGS)
+    client.close()
+
+    assert len(received) == 1
+    assert len(received[0][1]) == 3
+
+
+def test_worker_retries_once_per_attempt(webhook, monkeypatch):
+    """
+    The worker session has no adapter retries, so a 503 is sent max_attempts times, not 9.
+    """
+    monkeypatch.setattr(n8n.time, "sleep", lambda seconds: None)
+    base_url, received = webhook
+    client = N8NWebhookClient(f"{base_url}/busy")
+    client.post_incident_nowait(*INCIDENT_ARGS)
+    client.close()
+
+    assert len(received) == 3
+
+
+def test_worker_restarts_after_close(webhook):
+    base_url, received = webhook
+    client = N8NWebhookClient(f"{base_url}/ok")
+    client.post_incident_nowait(*INCIDENT_ARGS)
+    client.close()
+    client.post_incident_nowait(*INCIDENT_ARGS)
+    client.close()
+
+    assert len(received) == 2
+
+
+def test_async_client_lifecycle(webhook):
+    """
+    The async client is created on first use and closed, with the worker, on exit.
+    """
+    base_url, received = webhook
+
+    async def run():
+        async with N8NWebhookClient(f"{base_url}/ok") as client:
+            assert client.aclient is None
+            client.post_incident_nowait(*INCIDENT_ARGS)
+            result = await client.post_incident_async(*INCIDENT_ARGS)
+            assert client.aclient is not None
+        return client, result
+
+    client, result = asyncio.run(run())
+
+    assert result["success"]
+    assert client.aclient is None
+    assert client._worker_thread is None
+    assert len(received) == 2